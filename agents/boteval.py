@@ -24,7 +24,7 @@ def boteval(
         game.add_player(a_supplier())
         game.add_player(b_supplier())
         game.init_hand()
-        state = game.history._hands[0], game._deck.deck
+        state = game.history._hands[0], game._deck.snapshot()
         while game.running():
             game.step_move()
         payoff += game.pl_data[0].chips - game.buy_in
@@ -37,7 +37,7 @@ def boteval(
         # set hand + deck state
         game._players[0].hand, game._players[1].hand = state[0]
         game.history._hands[0] = state[0]
-        game._deck.deck = state[1]
+        game._deck.restore(state[1])
 
         while game.running():
             game.step_move()
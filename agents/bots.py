@@ -2,7 +2,8 @@
 Stores all poker bots
 '''
 import random
-from typing import List
+from functools import lru_cache
+from typing import FrozenSet, List
 from poker import hands
 from poker.game import Action, BettingStage, Game, Move, Player
 from poker.hands import HandType
@@ -90,23 +91,28 @@ class EquityBot(Player):
                 eq += 2
             return eq / 100.0
 
-        # brute force outs
-        combined = hand + community
-        current_best = hands.evaluate(combined)
-        outs = set()
+        return 2 * EquityBot.outs(frozenset(hand + community)) / 100.0
 
-        for card in iter(Deck()):
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def outs(combined: FrozenSet[Card]) -> int:
+        '''Brute force outs, cached by the set of known cards since order doesn't matter'''
+        known = list(combined)
+        current_type = hands.get_type(hands.evaluate(known))
+        outs = 0
+
+        for card in Deck.DECK:
             if card in combined:
                 continue
 
-            new_best = hands.evaluate([*combined, card])
+            new_type = hands.get_type(hands.evaluate([*known, card]))
 
             # set minimum hand to 'win' at three of a kind
-            if hands.get_type(new_best) > hands.get_type(current_best) and \
-               hands.get_type(new_best) >= HandType.TPAIR:
-                outs.add(card)
+            # HandType isn't ordered, compare values
+            if new_type.value > current_type.value and new_type.value >= HandType.TPAIR.value:
+                outs += 1
 
-        return 2 * len(outs) / 100.0
+        return outs
 
     def pot_odds(self, game: Game) -> float:
         '''Get current pot odds'''
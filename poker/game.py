@@ -1,6 +1,8 @@
 '''
 Classes to run a N player No-Limit Texas Hold'em game.
 '''
+from itertools import repeat
+from operator import itemgetter
 from typing import Iterator, List, Optional
 
 from . import hands
@@ -9,7 +11,7 @@ from .game_data import (
     PlayerData, PlayerState, Pots
 )
 from .history import GameHistory
-from .util import Card, Deck, check_throw, count
+from .util import Card, Deck, check_throw, fewer_than
 
 class Game:
     '''N player No-Limit Texas Hold'em'''
@@ -83,7 +85,7 @@ class Game:
 
     def init_hand(self):
         '''Initializes a new hand'''
-        if count(self.in_hand_players()) < 2:
+        if fewer_than(self.in_hand_players(), 2):
             self.state = GameState.OVER
             return
         self.state = GameState.RUNNING
@@ -91,7 +93,8 @@ class Game:
         for pl in self.pl_data:
             pl.reset_state()
 
-        self.pots = Pots(self.in_hand_players())
+        in_hand = list(self.in_hand_players())
+        self.pots = Pots(in_hand)
 
         # deal hands
         self.community = []
@@ -105,7 +108,7 @@ class Game:
         )
 
         # blinds
-        if count(self.in_hand_players()) == 2:
+        if len(in_hand) == 2:
             self.sb_id = self.button_id
         else:
             self.sb_id = self.next_player(self.button_id)
@@ -118,7 +121,7 @@ class Game:
         # antes
         if self.cfg.ante_amt > 0:
             match self.cfg.ante_idx:
-                case None: ante_players = self.in_hand_players()
+                case None: ante_players = in_hand
                 case 1:    ante_players = (self.bb_id,)
                 case -1:   ante_players = (self.button_id,)
             for i in ante_players:
@@ -243,13 +246,16 @@ class Game:
                 ncards = 3 if self.betting_stage() == BettingStage.PREFLOP else 1
                 self.community += self.history.deal(self._deck.deal(ncards))
 
+            board = tuple(self.community)
             rankings = sorted([
-                (i, hands.evaluate([*self.community, *self._players[i].hand]))
+                (i, hands.evaluate(board + tuple(self._players[i].hand)))
                 for i in self.pots.not_folded_players()
-            ], key=lambda x: x[1])
+            ], key=itemgetter(1))
 
             for pot in self.pots:
-                pot_rankings = [(p, r) for p, r in rankings if p in pot.players()]
+                # rankings is already sorted, filtering keeps the order
+                pot_players = pot.players()
+                pot_rankings = [(p, r) for p, r in rankings if p in pot_players]
                 winners = [p for p, r in pot_rankings if r == pot_rankings[0][1]]
                 win_value = pot.total() // len(winners)
                 remainder = pot.total() % len(winners)
@@ -275,8 +281,9 @@ class Game:
     def step_hand(self):
         '''Run one hand'''
         self.init_hand()
+        step_move = self.step_move
         while self.running():
-            self.step_move()
+            step_move()
 
     ### GETTERS ###
 
@@ -338,9 +345,10 @@ class Game:
             yield Action.CALL, None
 
             if self.cfg.is_limit():
-                raise_amt = self.get_current_limit()
+                limit = self.get_current_limit()
+                raise_amt = limit
                 # raise to complete limit if current raise is small
-                if to_call < self.get_current_limit() / 2:
+                if to_call < limit / 2:
                     raise_amt -= to_call
 
                 # if raise allowed
@@ -351,11 +359,11 @@ class Game:
                         yield Action.RAISE, raise_amt
 
                 # all-in that doesn't count as a raise
-                elif free_chips < self.get_current_limit() / 2:
+                elif free_chips < limit / 2:
                     yield Action.ALL_IN, None
             else:
                 # no-limit
-                yield from ((Action.RAISE, i) for i in range(max(1, self.last_raise), free_chips))
+                yield from zip(repeat(Action.RAISE), range(max(1, self.last_raise), free_chips))
                 yield Action.ALL_IN, None
 
     def translate_move(self, pl_id: int, action: Action, amt: int) -> Move:
@@ -55,6 +55,16 @@ class BettingStage(Enum):
     TURN = auto()
     RIVER = auto()
 
+# betting stages in order, avoids iterating the enum on each use
+BETTING_STAGES = tuple(BettingStage)
+
+# community cards dealt at the start of each post-flop betting stage
+STAGE_NCARDS = {
+    BettingStage.FLOP: 3,
+    BettingStage.TURN: 1,
+    BettingStage.RIVER: 1,
+}
+
 class PlayerState(Enum):
     '''
     Stores player's state for the current betting stage
@@ -208,8 +218,7 @@ class Pots:
 
     def fold(self, pl_id: int):
         '''Remove player from ALL pots, collect their bets'''
-        self.chips += self.bets.get(pl_id, 0)
-        self.bets.pop(pl_id)
+        self.chips += self.bets.pop(pl_id)
         for pot in self.prev_pots:
             pot.fold(pl_id)
 
@@ -220,21 +229,32 @@ class Pots:
         bet is all-in.
         Should be called at the end of the hand.
         '''
-        while not same(self.bets.values()):
-            max_stake = min(self.bets.values())
-            split = _PrevPot(0, set(self.players()))
-            split.chips = max_stake * len(split.players()) + self.chips
-
-            for p, bet in list(self.bets.items()):
-                if bet == max_stake:
-                    self.bets.pop(p)
-                    continue
-
-                self.bets[p] -= max_stake
-
-            self.raised = max(self.bets.values())
-            self.chips = 0
-            self.prev_pots.append(split)
+        if same(self.bets.values()):
+            return
+
+        # sweep bets in ascending order, each distinct bet below the top one closes a side pot
+        contribs = sorted(self.bets.items(), key=lambda x: x[1])
+        top = contribs[-1][1]
+        remaining = set(self.players())
+        taken = 0
+        for i, (p, bet) in enumerate(contribs):
+            if bet == top:
+                break
+
+            if i == 0 or bet != contribs[i - 1][1]:
+                self.prev_pots.append(_PrevPot(
+                    (bet - taken) * len(remaining) + self.chips,
+                    set(remaining)
+                ))
+                self.chips = 0
+                taken = bet
+
+            remaining.remove(p)
+            self.bets.pop(p)
+
+        for p in self.bets:
+            self.bets[p] -= taken
+        self.raised = top - taken
 
     def __iter__(self):
         '''Iterate over all pots'''
@@ -248,7 +268,7 @@ class Pots:
         out = f'(${self.chips}{" " if bets else ""}{bets})'
         return ', '.join([out, *(str(p) for p in reversed(self.prev_pots))])
 
-@dataclass
+@dataclass(slots=True)
 class PlayerData:
     '''Public player data'''
     chips: int
@@ -3,9 +3,10 @@ Functions to evaluate and rank poker hands
 '''
 from enum import auto, Enum
 from itertools import combinations
+from math import prod
 from typing import List
 
-from .util import Card, Rank, same
+from .util import Card, Rank
 
 class HandType(Enum):
     '''Ranked categories of poker hands'''
@@ -26,18 +27,14 @@ class HandType(Enum):
 
     def to_str(self) -> str:
         '''String hand description'''
-        return [
-            'High Card',
-            'Pair',
-            'Two Pair',
-            'Three of a Kind',
-            'Straight',
-            'Flush',
-            'Full House',
-            'Four of a Kind',
-            'Straight Flush',
-            'Royal Flush'
-        ][self.value]
+        # values start at 1
+        return _TYPE_NAMES[self.value - 1]
+
+# HandType.to_str names, in HandType order
+_TYPE_NAMES = (
+    'High Card', 'Pair', 'Two Pair', 'Three of a Kind', 'Straight',
+    'Flush', 'Full House', 'Four of a Kind', 'Straight Flush', 'Royal Flush'
+)
 
 class Hand(int):
     '''Prevent all these variables from polluting namespace'''
@@ -83,11 +80,9 @@ class Hand(int):
         1. (unique prime product of suited hand) -> hand rank
         3. hand rank -> hand string
         '''
+        primes = [r.prime for r in Rank]
         def key(*ranks) -> int:
-            prod = 1
-            for rank in ranks:
-                prod *= Rank(rank).prime
-            return prod
+            return prod(map(primes.__getitem__, ranks))
 
         unsuited = {}
         suited = {}
@@ -173,23 +168,20 @@ class Hand(int):
 
 
         # high, flush
-        n = Hand.HIGH_COUNT - 1
-        for a in iter(Rank):
-            for b in range(0, a):
-                for c in range(0, b):
-                    for d in range(0, c):
-                        for e in range(0, d):
-                            if [0, d - e, c - e, b - e, a - e] == [0, 1, 2, 3, 4]:
-                                continue
-                            if [e, d, c, b, a] == [0, 1, 2, 3, Rank.ACE]:
-                                continue
-
-                            k = key(a, b, c, d, e)
-                            unsuited[k] = n + Hand.HIGH_BEST
-                            suited[k] = n + Hand.FLUSH_BEST
-                            strings[n + Hand.HIGH_BEST] = 'High Card (' + a.to_str() + ' High)'
-                            strings[n + Hand.FLUSH_BEST] = 'Flush (' + a.to_str() + ' High)'
-                            n -= 1
+        # descending 5 rank combinations, best first
+        n = 0
+        for ranks in combinations(reversed(Rank), 5):
+            a, _, _, _, e = ranks
+            # skip straights, including the wheel
+            if a - e == 4 or ranks == (Rank.ACE, 3, 2, 1, 0):
+                continue
+
+            k = key(*ranks)
+            unsuited[k] = n + Hand.HIGH_BEST
+            suited[k] = n + Hand.FLUSH_BEST
+            strings[n + Hand.HIGH_BEST] = 'High Card (' + a.to_str() + ' High)'
+            strings[n + Hand.FLUSH_BEST] = 'Flush (' + a.to_str() + ' High)'
+            n += 1
 
         return unsuited, suited, strings
 
@@ -198,16 +190,18 @@ def evaluate(cards: List[Card]) -> int:
     if len(cards) == 1:
         cards = cards[0]
     if len(cards) == 5:
-        return lookup(list(cards))
+        return lookup(cards)
 
     assert len(cards) > 5
 
-    return min(map(evaluate, combinations(cards, 5)))
+    # combinations are always 5 cards, skip the length checks in evaluate
+    return min(map(lookup, combinations(cards, 5)))
 
 def lookup(cards: List[Card]) -> int:
     '''Access hand ranking lookup table.'''
-    lut = Hand.SUITED if same(map(Card.get_suit, cards)) else Hand.UNSUITED
-    return lut.get(Card.prime_prod(cards))
+    a, b, c, d, e = cards
+    lut = Hand.SUITED if a.suit == b.suit == c.suit == d.suit == e.suit else Hand.UNSUITED
+    return lut[a.prime * b.prime * c.prime * d.prime * e.prime]
 
 def rank_pct(hand: Hand) -> float:
     '''What percent of random hands are worse than this hand'''
@@ -215,27 +209,30 @@ def rank_pct(hand: Hand) -> float:
 
 def get_type(hand: Hand) -> HandType:
     '''Retuns the HandType of a hand rank'''
-    if hand == 1:
-        return HandType.ROYAL_FLUSH
-
-    for t, best in enumerate([
-        Hand.PAIR_BEST,
-        Hand.TPAIR_BEST,
-        Hand.TRIPS_BEST,
-        Hand.STRAIGHT_BEST,
-        Hand.FLUSH_BEST,
-        Hand.FULL_BEST,
-        Hand.FOURS_BEST,
-        Hand.STR_FLUSH_BEST
-    ]):
-        if hand >= best:
-            return HandType(t)
-
-    return Hand.HIGH_BEST
+    return _TYPES[hand]
 
 def to_str(hand: Hand) -> str:
     '''Pretty print hand type'''
     return Hand.STRINGS[hand]
 
+def _generate_types() -> tuple:
+    '''Hand rank -> HandType table, index 0 is unused'''
+    types = [None, HandType.ROYAL_FLUSH]
+    for t, worst in [
+        (HandType.STR_FLUSH, Hand.STR_FLUSH_WORST),
+        (HandType.FOURS,     Hand.FOURS_WORST),
+        (HandType.FULL,      Hand.FULL_WORST),
+        (HandType.FLUSH,     Hand.FLUSH_WORST),
+        (HandType.STRAIGHT,  Hand.STRAIGHT_WORST),
+        (HandType.TRIPS,     Hand.TRIPS_WORST),
+        (HandType.TPAIR,     Hand.TPAIR_WORST),
+        (HandType.PAIR,      Hand.PAIR_WORST),
+        (HandType.HIGH,      Hand.HIGH_WORST),
+    ]:
+        types += [t] * (worst + 1 - len(types))
+    return tuple(types)
+
 # suited/unsuited lookup table {hand: rank}, pretty printed strings ordered by rank
 Hand.UNSUITED, Hand.SUITED, Hand.STRINGS = Hand.generate_lookup()
+# hand rank -> HandType
+_TYPES = _generate_types()
@@ -2,40 +2,55 @@
 Datastructure to store poker game history, works with Game from poker.game.
 Stores and loads PHH file format.
 '''
-from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 
 from . import hands
-from .game_data import BettingStage, GameConfig, Move
+from .game_data import BETTING_STAGES, BettingStage, GameConfig, Move, STAGE_NCARDS
 from .hands import Hand
-from .util import Card, reorder
+from .util import Card, reorder_perm
 
-@dataclass
+@dataclass(slots=True)
 class ActionEntry:
     '''Entry for an action'''
     stage: BettingStage
     player: int
     move: Move
+    _move_str: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def move_str(self) -> str:
+        '''Move as string, formatted on first use'''
+        if self._move_str is None:
+            self._move_str = self.move[0].to_str(self.move[1])
+        return self._move_str
 
     def __str__(self) -> str:
-        return f'P{self.player} {self.move[0].to_str(self.move[1])}'
+        return f'P{self.player} {self.move_str}'
     def __repr__(self) -> str:
-        return f'{self.stage.name} P{self.player} {self.move[0].to_str(self.move[1])}'
+        return f'{self.stage.name} P{self.player} {self.move_str}'
 
-@dataclass
+@dataclass(slots=True)
 class ResultEntry:
     '''Entry for each result of a round (one per pot)'''
     pot_total: int
     winners: List[int]
     # None if win from fold
     winning_hand: Optional[Hand]
+    _desc: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def desc(self) -> str:
+        '''Winning hand description, formatted on first use'''
+        if self._desc is None:
+            self._desc = hands.to_str(self.winning_hand) if \
+                self.winning_hand is not None else \
+                'others folding'
+        return self._desc
 
     def __str__(self) -> str:
         winners = ', '.join(str(w+1) for w in self.winners)
-        desc = hands.to_str(self.winning_hand) if \
-            self.winning_hand is not None else \
-            'others folding'
-        return f'Players [{winners}] win ${self.pot_total} with {desc}'
+        return f'Players [{winners}] win ${self.pot_total} with {self.desc}'
 
 class GameHistory:
     '''Datastructure to store poker game history, works with Game from poker.game'''
@@ -50,27 +65,31 @@ class GameHistory:
         self.results: List[List[ResultEntry]] = []
 
         self.hand_count = 0
+        # index into actions where each hand's actions start
+        self._hand_starts: List[int] = [0]
+        # actions_by_stage result for finished hands
+        self._stage_cache: Dict[int, Tuple[tuple, tuple, tuple, tuple]] = {}
+        # game index -> history index for the current hand
+        self._hist_idx: List[int] = []
 
     ### ADD TO HISTORY ###
 
-    def __reorder_new_list(self, l: list) -> list:
-        return reorder(lambda idx: self.to_history_index(self.hand_count - 1, idx), l)
-
     def init_hand(self, chips: List[int], round_hands: List[Tuple[Card]]):
         '''Add new round's hands to history'''
         self.players = len(chips)
         self.hand_count += 1
         self.cards.append([])
-        self._hands.append(self.__reorder_new_list(round_hands))
-        self.chips.append(self.__reorder_new_list(chips))
+
+        # index tables for the current hand, used instead of modular arithmetic per call
+        hand = self.hand_count - 1
+        self._hist_idx = [self.to_history_index(hand, i) for i in range(self.players)]
+        perm = [self.to_game_index(hand, i) for i in range(self.players)]
+        self._hands.append(reorder_perm(perm, round_hands))
+        self.chips.append(reorder_perm(perm, chips))
 
     def add_action(self, stage: BettingStage, player: int, action: Move):
         '''Add player action to history'''
-        self.actions.append(ActionEntry(
-            stage,
-            self.to_history_index(self.hand_count - 1, player),
-            action
-        ))
+        self.actions.append(ActionEntry(stage, self._hist_idx[player], action))
 
     def deal(self, cards: List[Card]) -> List[Card]:
         '''Add dealt card to history'''
@@ -81,12 +100,13 @@ class GameHistory:
         '''Call before calling add_result, after the end of the hand, before processing pots'''
         self.results.append([])
         self.actions.append(None)
+        self._hand_starts.append(len(self.actions))
 
     def add_result(self, pot_amt: int, winners: List[int], top_hand: Hand):
         '''Add result for each pot processed'''
         self.results[-1].append(ResultEntry(
             pot_amt,
-            [self.to_history_index(self.hand_count - 1, w) for w in winners],
+            [self._hist_idx[w] for w in winners],
             top_hand
         ))
 
@@ -104,53 +124,49 @@ class GameHistory:
 
     def actions_by_hand(self) -> List[List[Optional[ActionEntry]]]:
         '''Split actions into actions per hand'''
-        out = [[] for _ in range(self.hand_count)]
-        i = 0
-        for a in self.actions:
-            if a is None:
-                i += 1
-            else:
-                out[i].append(a)
-        return out
+        return [self.hand_actions(h) for h in range(self.hand_count)]
 
     def hand_actions(self, hand: int) -> List[Optional[ActionEntry]]:
         '''Get actions taken in specific hand'''
-        h = 0
-        start = 0
-        while h < hand:
-            if self.actions[start] is None:
-                h += 1
-            start += 1
-        end = start
-        while True:
-            if end == len(self.actions) or self.actions[end] is None:
-                break
-            end += 1
+        start = self._hand_starts[hand]
+        # hand in progress has no None terminator yet
+        end = self._hand_starts[hand + 1] - 1 if hand + 1 < len(self._hand_starts) \
+            else len(self.actions)
         return self.actions[start:end]
 
-    def actions_by_stage(self, hand: int) -> Tuple[list, list, list, list]:
+    def actions_by_stage(self, hand: int) -> Tuple[tuple, tuple, tuple, tuple]:
         '''Split actions for hand into preflop, flop, turn, and river betting stages'''
-        lists = { r: [] for r in iter(BettingStage) }
+        if hand in self._stage_cache:
+            return self._stage_cache[hand]
+
+        lists = ([], [], [], [])
         for action in self.hand_actions(hand):
-            lists[action.stage].append(action)
-        return (lists.get(r) for r in iter(BettingStage))
+            # BettingStage values start at 1
+            lists[action.stage.value - 1].append(action)
+
+        # immutable so the cached result can be handed out safely
+        stages = tuple(map(tuple, lists))
+        # actions can still be added to a hand in progress
+        if hand + 1 < len(self._hand_starts):
+            self._stage_cache[hand] = stages
+        return stages
 
     def __str__(self) -> str:
-        out = ('Fixed' if self.cfg.is_limit() else 'No') + ' Limit Hold\'em\n'
+        out = [('Fixed' if self.cfg.is_limit() else 'No') + ' Limit Hold\'em\n']
 
-        for i, (hand, cards, results) in enumerate(zip(self._hands, self.cards, self.results)):
-            out += 'Hands: ' + str(hand) + '\n'
+        for i, (hole_cards, cards, results) in enumerate(zip(self._hands, self.cards, self.results)):
+            out.append('Hands: ' + str(hole_cards) + '\n')
 
             card_idx = 0
-            for r, actions in zip(iter(BettingStage), self.actions_by_stage(i)):
+            for r, actions in zip(BETTING_STAGES, self.actions_by_stage(i)):
                 if len(actions) == 0 and len(cards[card_idx:]) == 0:
                     continue
 
-                out += '\n' + r.name + '\n'
+                out.append('\n' + r.name + '\n')
 
-                if r != BettingStage.PREFLOP:
-                    ncards = 3 if r == BettingStage.FLOP else 1
-                    out += f'New Cards: {cards[card_idx:card_idx + ncards]}\n'
+                if r in STAGE_NCARDS:
+                    ncards = STAGE_NCARDS[r]
+                    out.append(f'New Cards: {cards[card_idx:card_idx + ncards]}\n')
                     card_idx += ncards
                 elif self.cfg.has_blinds():
                     if self.players == 2:
@@ -160,29 +176,26 @@ class GameHistory:
                         sb = 1
                         bb = 2
 
-                    out += (
+                    out.append(
                         f'P{sb} posted small blind (${self.cfg.small_blind})\n'
                         f'P{bb} posted big blind (${self.cfg.big_blind})\n'
                     )
 
                 for action in actions:
-                    out += f'P{action.player+1} {action.move[0].to_str(action.move[1])}\n'
+                    out.append(f'P{action.player+1} {action.move_str}\n')
 
-            out += '\n'
+            out.append('\n')
             for result in results:
-                desc = hands.to_str(result.winning_hand) if   \
-                    result.winning_hand is not None else \
-                    'others folding'
-                out += (
+                out.append(
                     'Players ['
                     + ', '.join(str(w+1) for w in result.winners)
                     + f'] win ${result.pot_total} with '
-                    + desc
+                    + result.desc
                     + '\n'
                 )
-            out += '\n'
+            out.append('\n')
 
-        return out[:-2]
+        return ''.join(out)[:-2]
 
     def __repr__(self) -> str:
         return self.__str__()
@@ -3,32 +3,65 @@ Functions for reading from and exporting to .phh format.
 All really messy, should be cleaned up.
 '''
 
-from typing import BinaryIO
-
-from pip._vendor import tomli
+from operator import itemgetter
+import tomllib
+from typing import BinaryIO, Iterator, List
 
 from . import hands
-from .game_data import Action, BettingStage, GameConfig, Pots
+from .game_data import (
+    Action, BETTING_STAGES, BettingStage, GameConfig, Move, Pots, STAGE_NCARDS
+)
 from .history import ActionEntry, GameHistory, ResultEntry
 from .util import Card
 
+# action line templates for dump
+_FOLD_LINE = '  "p%d f",'
+_CALL_LINE = '  "p%d cc",'
+_RAISE_LINE = '  "p%d cbr %d",'
+_SHOW_LINE = '  "p%d sm %s%s",\n'
+
 class PHHParseError(ValueError):
     '''Error parsing .phh file'''
 
+def _load_cbr(pots: Pots, player: int, args: List[str]) -> Move:
+    '''Apply complete/bet/raise to pots, returns equivalent move'''
+    bet = int(args[0]) - pots.bets.get(player, 0)
+    amt_raised = bet - pots.chips_to_call(player)
+    pots.bet(player, bet)
+    return Action.RAISE, amt_raised
+
+def _load_cc(pots: Pots, player: int, _: List[str]) -> Move:
+    '''Apply check/call to pots, returns equivalent move'''
+    pots.bet(player, pots.chips_to_call(player))
+    return Action.CALL, None
+
+def _load_f(pots: Pots, player: int, _: List[str]) -> Move:
+    '''Apply fold to pots, returns equivalent move'''
+    pots.fold(player)
+    return Action.FOLD, None
+
+# player action type -> handler, other player actions (e.g. showing cards) are skipped
+_PLAYER_ACTIONS = {
+    'cbr': _load_cbr,
+    'cc': _load_cc,
+    'f': _load_f,
+}
+
 def load(file: BinaryIO) -> GameHistory:
     # pylint: disable=protected-access
     '''Construct GameHistory from .phh file.'''
-    data = tomli.load(file)
+    data = tomllib.load(file)
 
     if data['variant'] not in ('NT', 'FT'):
         raise PHHParseError('Game variant not supported!')
 
     fixed = data['variant'] == 'FT'
     antes = data['antes']
+    blinds = data['blinds_or_straddles']
 
     out = GameHistory(GameConfig(
-        small_blind=data['blinds_or_straddles'][0],
-        big_blind=data['blinds_or_straddles'][1],
+        small_blind=blinds[0],
+        big_blind=blinds[1],
         small_bet=data['small_bet'] if fixed else 0,
         big_bet=data['big_bet'] if fixed else 0,
         min_bet=0 if fixed else data['min_bet'],
@@ -46,21 +79,34 @@ def load(file: BinaryIO) -> GameHistory:
     # keep track of pots for results, init pot with antes and blinds
     pots = Pots()
     pots.chips = sum(antes)
-    pots.bets = dict(enumerate(data['blinds_or_straddles']))
+    pots.bets = dict(enumerate(blinds))
     pots.raised = out.cfg.big_blind
 
-    stage_it = iter(BettingStage)
+    stage_it = iter(BETTING_STAGES)
     stage = next(stage_it)
+    # bound once, the loop below runs for every action in the file
+    add_action = out.actions.append
     for action in data['actions']:
         actor, a_type, *args = action.split()
 
         if actor == 'd':
             if a_type == 'dh':
-                h = [None if '?' in h else Card.new(h) for h in zip(args[1][0::2], args[1][1::2])]
+                cardstr = args[1]
+                if '?' in cardstr:
+                    # unknown cards are stored as None
+                    h = [
+                        None if '?' in cardstr[i:i+2] else Card.new(cardstr[i:i+2])
+                        for i in range(0, len(cardstr), 2)
+                    ]
+                else:
+                    h = Card.new(cardstr)
                 out._hands[0][int(args[0][1])-1] = tuple(h)
             elif a_type == 'db':
                 card = Card.new(args[0])
-                out.cards[0].extend([card] if isinstance(card, Card) else card)
+                if isinstance(card, Card):
+                    out.cards[0].append(card)
+                else:
+                    out.cards[0].extend(card)
 
                 stage = next(stage_it)
                 pots.collect_bets()
@@ -69,21 +115,10 @@ def load(file: BinaryIO) -> GameHistory:
 
             continue
 
-        player = int(actor[1]) - 1
-        if a_type == 'cbr':
-            bet = int(args[0]) - pots.bets.get(player, 0)
-            amt_raised = bet - pots.chips_to_call(player)
-            pots.bet(player, bet)
-
-            out.actions.append(ActionEntry(stage, player, (Action.RAISE, amt_raised)))
-        elif a_type == 'cc':
-            pots.bet(player, pots.chips_to_call(player))
-
-            out.actions.append(ActionEntry(stage, player, (Action.CALL, None)))
-        elif a_type == 'f':
-            pots.fold(player)
-
-            out.actions.append(ActionEntry(stage, player, (Action.FOLD, None)))
+        handler = _PLAYER_ACTIONS.get(a_type)
+        if handler is not None:
+            player = int(actor[1]) - 1
+            add_action(ActionEntry(stage, player, handler(pots, player, args)))
 
     # split pot into side pots
     pots.split()
@@ -99,13 +134,15 @@ def load(file: BinaryIO) -> GameHistory:
         ))
     # create rankings
     else:
+        board = tuple(out.cards[0])
         rankings = sorted([
-            (i, hands.evaluate([*out.cards[0], *out._hands[0][i]]))
+            (i, hands.evaluate(board + out._hands[0][i]))
             for i in pots.not_folded_players()
-        ], key=lambda x: x[1])
+        ], key=itemgetter(1))
 
         for pot in pots:
-            pot_rankings = [r for r in rankings if r[0] in pot.players()]
+            pot_players = pot.players()
+            pot_rankings = [r for r in rankings if r[0] in pot_players]
             winners = [p for p, h in pot_rankings if h == pot_rankings[0][1]]
             out.results[-1].append(ResultEntry(
                 pot.total(),
@@ -116,12 +153,16 @@ def load(file: BinaryIO) -> GameHistory:
     return out
 
 def dump(history: GameHistory, hand: int=0) -> str:
-    # pylint: disable=protected-access
     '''Dump one hand's history to .phh file format'''
+    return ''.join(_dump_lines(history, hand))
+
+def _dump_lines(history: GameHistory, hand: int) -> Iterator[str]:
+    # pylint: disable=protected-access
+    '''Generate chunks of .phh file for one hand's history'''
 
     # there are not enough hands to export requested hand
     if history.hand_count < hand + 1:
-        return ''
+        return
 
     blinds = [history.cfg.small_blind, history.cfg.big_blind] + [0] * (history.players - 2)
     variant = 'FT' if history.cfg.is_limit() else 'NT'
@@ -133,7 +174,7 @@ def dump(history: GameHistory, hand: int=0) -> str:
         case -1: antes = [0] * (history.players - 1) + [history.cfg.ante_amt]
         case  _: antes = [history.cfg.ante_amt] * history.players
 
-    out = (
+    yield (
         f'variant = "{variant}"\n'
         f'antes = {antes}\n'
         f'blinds_or_straddles = {blinds}\n'
@@ -149,68 +190,70 @@ def dump(history: GameHistory, hand: int=0) -> str:
 
     board = history.cards[hand]
 
-    # showing holecards
-    hand_a = history.hand_actions(hand)
-    folded = set(a.player for a in hand_a if a.move[0] == Action.FOLD)
-    if len(folded) < history.players - 1:
-        hand_a_stages = (a.stage if a is not None else None for a in hand_a)
-        showdown_stage = (
-            BettingStage.PREFLOP if BettingStage.FLOP not in hand_a_stages else
-            BettingStage.FLOP    if BettingStage.TURN not in hand_a_stages else
-            BettingStage.TURN    if BettingStage.RIVER not in hand_a_stages else
-            BettingStage.RIVER)
-        showdown_string = ''.join(
-            f'  "p{i+1} sm {history._hands[hand][i][0]}{history._hands[hand][i][1]}",\n'
-            for i in range(history.players)
-            if i not in folded
-        )
-    else:
-        showdown_stage = None
-        showdown_string = ''
+    stages = history.actions_by_stage(hand)
 
-    for r, actions in zip(iter(BettingStage), history.actions_by_stage(hand)):
-        if r == BettingStage.PREFLOP:
-            out += f'  # {r.name}\n'
+    # holecards are shown after the last stage with any actions,
+    # once a stage has no actions (all in) neither do later stages
+    _, flop, turn, river = stages
+    showdown_stage = BETTING_STAGES[bool(flop) + bool(turn) + bool(river)]
+
+    # filled in by the action loop, complete by the time showdown_stage is reached
+    folded = set()
+
+    # enum members looked up once for the action loop
+    fold, call, all_in = Action.FOLD, Action.CALL, Action.ALL_IN
+    card_idx = 0
+    for r, actions in zip(BETTING_STAGES, stages):
+        if r is BettingStage.PREFLOP:
+            yield f'  # {r.name}\n'
             # deal hands
             for i, hole in enumerate(history._hands[hand]):
-                out += f'  "d dh p{i+1} {hole[0]}{hole[1]}",\n'
+                yield f'  "d dh p{i+1} {hole[0]}{hole[1]}",\n'
 
-            bets = dict(enumerate(blinds))
+            bets = list(blinds)
+            max_bet = max(blinds)
         else:
-            try:
-                if r == BettingStage.FLOP:
-                    cards = (board[0], board[1], board[2])
-                elif r == BettingStage.TURN:
-                    cards = (board[3],)
-                elif r == BettingStage.RIVER:
-                    cards = (board[4],)
-            except IndexError:
+            ncards = STAGE_NCARDS[r]
+            cards = board[card_idx:card_idx + ncards]
+            card_idx += ncards
+            # board was not fully dealt
+            if len(cards) < ncards:
                 break
 
-            out += f'  # {r.name}\n'
-            out += f'  "d db {''.join(str(c) for c in cards)}",\n'
+            yield f'  # {r.name}\n'
+            yield f'  "d db {''.join(map(str, cards))}",\n'
 
-            bets = dict.fromkeys(range(history.players), 0)
+            bets = [0] * history.players
+            max_bet = 0
 
+        # max_bet tracks max(bets) as actions are applied
         for a in actions:
-            if a.move[0] == Action.FOLD:
-                a_type = 'f'
-                bets[a.player] = 0
-            elif a.move[0] == Action.CALL:
-                a_type = 'cc'
-                bets[a.player] = max(bets.values())
+            player = a.player
+            move, amt = a.move
+            if move is fold:
+                yield _FOLD_LINE % (player + 1)
+                folded.add(player)
+                folded_bet = bets[player]
+                bets[player] = 0
+                # only need to rescan if the largest bet was folded
+                if folded_bet == max_bet:
+                    max_bet = max(bets)
+            elif move is call:
+                yield _CALL_LINE % (player + 1)
+                bets[player] = max_bet
             else:
-                raised_to = a.move[1] + max(bets.values())
-                a_type = f'cbr {raised_to}'
-                bets[a.player] = raised_to
-
-            out += f'  "p{a.player+1} {a_type}",'
+                raised_to = amt + max_bet
+                yield _RAISE_LINE % (player + 1, raised_to)
+                bets[player] = raised_to
+                max_bet = max(max_bet, raised_to)
 
-            if a.move[0] == Action.ALL_IN:
-                out += ' # All-in'
-            out += '\n'
+            if move is all_in:
+                yield ' # All-in'
+            yield '\n'
 
-        if showdown_stage == r:
-            out += showdown_string
+        if showdown_stage is r and len(folded) < history.players - 1:
+            for i, (c0, c1) in enumerate(history._hands[hand]):
+                if i not in folded:
+                    yield _SHOW_LINE % (i + 1, c0, c1)
 
-    return out + ']\n'
+    yield ']\n'
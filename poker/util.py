@@ -4,22 +4,26 @@ Utility classes Suit, Rank, Card, Hand
 from copy import copy
 from enum import IntEnum
 from functools import wraps
-from itertools import groupby
-from math import prod
+from itertools import islice
 from random import shuffle
 from typing import Callable, List, Iterable, Tuple, Type, TypeVar
 
 T = TypeVar('T')
 
 def same(it: Iterable) -> bool:
-    '''True if all items in iterable are equal'''
-    g = groupby(it)
-    # checks that there is only one group
-    return next(g, True) and not next(g, False)
+    '''True if all (hashable) items in iterable are equal'''
+    return len(set(it)) <= 1
 
 def count(it: Iterable) -> int:
-    '''Loops through it to find length'''
-    return sum(1 for _ in it)
+    '''Length of it, looping through it only if it isn't sized'''
+    try:
+        return len(it)
+    except TypeError:
+        return sum(1 for _ in it)
+
+def fewer_than(it: Iterable, n: int) -> bool:
+    '''True if it has fewer than n items, stops looping after n items'''
+    return count(islice(it, n)) < n
 
 def reorder(idx_to_idx: Callable[[int], int], l: List):
     '''Reorders list based on index mapping idx_to_idx'''
@@ -28,6 +32,10 @@ def reorder(idx_to_idx: Callable[[int], int], l: List):
         out[idx_to_idx(i)] = item
     return out
 
+def reorder_perm(perm: List[int], l: List) -> List:
+    '''Reorders list based on precomputed permutation, out[i] = l[perm[i]]'''
+    return [l[i] for i in perm]
+
 def check_throw(exception_t: Type[Exception]):
     '''
     Decorator that turns a function that returns a bool and message into
@@ -56,7 +64,10 @@ class Suit(IntEnum):
     @staticmethod
     def from_str(s: str) -> 'Suit':
         '''Create Suit from string'''
-        return Suit('shdc'.index(s))
+        try:
+            return _SUIT_BY_STR[s]
+        except KeyError as e:
+            raise ValueError(f'Invalid suit string {s}') from e
 
     def to_str(self) -> str:
         '''Convert Suit to string'''
@@ -81,7 +92,10 @@ class Rank(IntEnum):
     @staticmethod
     def from_str(s: str) -> 'Rank':
         '''Create Rank from string'''
-        return Rank('23456789TJQKA'.index(s))
+        try:
+            return _RANK_BY_STR[s]
+        except KeyError as e:
+            raise ValueError(f'Invalid rank string {s}') from e
 
     def __init__(self, *args):
         super().__init__(args)
@@ -94,33 +108,37 @@ class Rank(IntEnum):
 
     def prettyprint(self) -> str:
         '''Card names'''
-        return [
-            'Two',
-            'Three',
-            'Four',
-            'Five',
-            'Six',
-            'Seven',
-            'Eight',
-            'Nine',
-            'Ten',
-            'Jack',
-            'Queen',
-            'King',
-            'Ace'
-        ][self.value]
+        return _RANK_NAMES[self.value]
+
+# Rank.prettyprint names, indexed by rank
+_RANK_NAMES = (
+    'Two', 'Three', 'Four', 'Five', 'Six', 'Seven', 'Eight',
+    'Nine', 'Ten', 'Jack', 'Queen', 'King', 'Ace'
+)
+
+# members by value, used to coerce ints in Card.__init__
+_SUITS = tuple(Suit)
+_RANKS = tuple(Rank)
+
+# character -> Suit/Rank, used by from_str
+_SUIT_BY_STR = {s.to_str(): s for s in iter(Suit)}
+_RANK_BY_STR = {r.to_str(): r for r in iter(Rank)}
 
 class Card:
     '''6 bits: 2 suit + 4 rank'''
+    __slots__ = ('value', 'rank', 'suit', 'prime')
 
     @staticmethod
     def new(s: str) -> 'Card' | List['Card']:
         '''Create card from string, ex. Kh (king of hearts), or multiple cards'''
         assert len(s) % 2 == 0
-        if len(s) == 2:
-            return Card(Rank.from_str(s[0]), Suit.from_str(s[1]))
+        try:
+            if len(s) == 2:
+                return _CARD_TABLE[s]
 
-        return [Card(Rank.from_str(s[i]), Suit.from_str(s[i+1])) for i in range(0, len(s), 2)]
+            return [_CARD_TABLE[s[i:i+2]] for i in range(0, len(s), 2)]
+        except KeyError as e:
+            raise ValueError(f'Invalid card string {s}') from e
 
     @staticmethod
     def from_int(i: int) -> 'Card':
@@ -129,20 +147,27 @@ class Card:
         assert (i >> 4)  < len(Suit)
         return Card(i & 0xF, i >> 4)
 
-    @staticmethod
-    def prime_prod(cards: List['Card']) -> int:
-        '''Return prime product of list of cards'''
-        return prod(c.rank.prime for c in cards)
+    @classmethod
+    def _raw(cls, rank: Rank, suit: Suit) -> 'Card':
+        '''Create card from Rank and Suit members, skips coercion in __init__'''
+        card = object.__new__(cls)
+        card.value = (suit << 4) | rank
+        card.rank = rank
+        card.suit = suit
+        card.prime = rank.prime
+        return card
 
     def __init__(self, rank: int, suit: int):
+        if not (0 <= rank < len(_RANKS) and 0 <= suit < len(_SUITS)):
+            raise ValueError(f'Invalid rank {rank} or suit {suit}')
+
         self.value = (suit << 4) | rank
-        self.rank = rank
-        self.suit = suit
+        # index instead of calling the enum, works for both ints and members
+        self.rank = _RANKS[rank]
+        self.suit = _SUITS[suit]
 
-        if not isinstance(self.rank, Rank):
-            self.rank = Rank(self.rank)
-        if not isinstance(self.suit, Suit):
-            self.suit = Suit(self.suit)
+        # cached for hand evaluation
+        self.prime = self.rank.prime
 
     def get_rank(self) -> Rank:
         '''Rank getter'''
@@ -166,27 +191,55 @@ class Card:
     def __repr__(self) -> str:
         return self.__str__()
     def __str__(self) -> str:
-        return Rank(self.rank).to_str() + Suit(self.suit).to_str()
+        return _CARD_STRS[self.value]
+
+# card string -> Card for all 52 cards, used by Card.new
+_CARD_TABLE = {r.to_str() + s.to_str(): Card._raw(r, s) for s in iter(Suit) for r in iter(Rank)}
+# int representation -> card string, used by Card.__str__
+_CARD_STRS = {c.value: s for s, c in _CARD_TABLE.items()}
 
 class Deck:
     '''52-card list with helper methods for dealing'''
 
-    DECK = [Card(r, s) for s in iter(Suit) for r in [Rank.ACE] + list(range(Rank.TWO, Rank.ACE))]
+    DECK = [
+        _CARD_TABLE[r.to_str() + s.to_str()]
+        for s in iter(Suit)
+        for r in [Rank.ACE] + list(map(Rank, range(Rank.TWO, Rank.ACE)))
+    ]
 
     def __init__(self):
         self.deck = copy(Deck.DECK)
+        # cards dealt since the last shuffle, deck is logically rotated right by this amount
+        self.dealt = 0
+
+    def __rotated(self) -> List[Card]:
+        k = self.dealt % len(self.deck)
+        return self.deck[-k:] + self.deck[:-k]
 
     def deal(self, n: int=1) -> List[Card]:
         '''Deal n cards, put those cards at the back of the deck'''
         assert n >= 1
 
-        out = self.deck[-n:]
-        self.deck = out + self.deck[:-n]
+        # last n cards of the rotated deck, without rotating the list
+        size = len(self.deck)
+        out = [self.deck[(i - self.dealt) % size] for i in range(size - n, size)]
+        self.dealt += n
         return out
 
     def shuffle(self):
         '''Shuffle internal card list'''
+        self.deck[:] = self.__rotated()
+        self.dealt = 0
         shuffle(self.deck)
 
+    def snapshot(self) -> Tuple[List[Card], int]:
+        '''Copy of the deck state (card list and dealt count), see restore'''
+        return list(self.deck), self.dealt
+
+    def restore(self, state: Tuple[List[Card], int]):
+        '''Restore deck state from snapshot, the next deal continues from that point'''
+        deck, self.dealt = state
+        self.deck = list(deck)
+
     def __iter__(self):
-        return iter(self.deck)
+        return iter(self.__rotated())
@@ -7,29 +7,63 @@ import unittest
 import random
 
 from agents import bots
+from agents.bots import EquityBot
 from poker import phh
-from poker.game_data import GameConfig, InvalidMoveError
-from poker.hands import evaluate, Hand
-from poker.util import Card, count, same
-from poker.game import Action, Game
+from poker.game_data import GameConfig, InvalidMoveError, Pots
+from poker.hands import evaluate, get_type, Hand, HandType
+from poker.util import Card, count, Deck, fewer_than, reorder, reorder_perm, same
+from poker.game import Action, BettingStage, Game
 
 class TestUtils(unittest.TestCase):
     def test_same(self):
         '''Test same method'''
         self.assertTrue(same([1, 1, 1]))
         self.assertFalse(same([1, 1, 0]))
+        self.assertTrue(same([]))
 
     def test_count(self):
         '''Test count method'''
         self.assertEqual(count(map(lambda x: x**2, [0, 1, 2])), 3)
+        self.assertEqual(count([0, 1, 2, 3]), 4)
+
+    def test_fewer_than(self):
+        '''Test fewer_than method'''
+        self.assertTrue(fewer_than(iter([1]), 2))
+        self.assertFalse(fewer_than(iter([1, 2]), 2))
+        self.assertFalse(fewer_than(iter([1, 2, 3]), 2))
+
+    def test_reorder(self):
+        '''Test reorder and reorder_perm agree'''
+        l = ['a', 'b', 'c', 'd']
+        self.assertEqual(reorder(lambda i: (i + 1) % 4, l), ['d', 'a', 'b', 'c'])
+        # reorder_perm takes the inverse mapping
+        self.assertEqual(reorder_perm([3, 0, 1, 2], l), reorder(lambda i: (i + 1) % 4, l))
+
+    def test_card_range(self):
+        '''Test Card rejects out of range ranks and suits'''
+        self.assertEqual(str(Card(12, 0)), 'As')
+        self.assertRaises(ValueError, Card, -1, 0)
+        self.assertRaises(ValueError, Card, 13, 0)
+        self.assertRaises(ValueError, Card, 0, 4)
+
+    def test_deck_snapshot(self):
+        '''Test restoring a deck snapshot deals the same cards'''
+        deck = Deck()
+        deck.shuffle()
+        deck.deal(4)
+        state = deck.snapshot()
+        dealt = deck.deal(5)
+
+        other = Deck()
+        other.shuffle()
+        other.restore(state)
+        self.assertEqual(other.deal(5), dealt)
 
 class TestLUT(unittest.TestCase):
     def test_coverage(self):
         '''Make sure all hand ranks are in LUT'''
-        unsuited = Hand.UNSUITED.values()
-        suited = Hand.SUITED.values()
-        for i in range(1, Hand.HAND_COUNT + 1):
-            self.assertTrue(i in unsuited or i in suited)
+        ranks = set(Hand.UNSUITED.values()) | set(Hand.SUITED.values())
+        self.assertTrue(ranks.issuperset(range(1, Hand.HAND_COUNT + 1)))
 
 class TestHand(unittest.TestCase):
     def test_hand_ranks(self):
@@ -60,6 +94,15 @@ class TestHand(unittest.TestCase):
             1
         ])
 
+    def test_hand_types(self):
+        '''Test hand rank to HandType'''
+        self.assertEqual(get_type(evaluate(Card.new('Tc7h4dKc2s'))), HandType.HIGH)
+        self.assertEqual(get_type(evaluate(Card.new('KcKh7d7c5s'))), HandType.TPAIR)
+        self.assertEqual(get_type(evaluate(Card.new('Ac2h3d4c5s'))), HandType.STRAIGHT)
+        self.assertEqual(get_type(evaluate(Card.new('KcKhKd7c7s'))), HandType.FULL)
+        self.assertEqual(get_type(evaluate(Card.new('2s3s4s5s6s'))), HandType.STR_FLUSH)
+        self.assertEqual(get_type(evaluate(Card.new('ThJhQhKhAh'))), HandType.ROYAL_FLUSH)
+
     def test_highest_hand(self):
         '''Test finding highest hand from 7 card hand'''
         self.assertEqual(evaluate(Card.new('ThJhQhKhAh')),
@@ -67,6 +110,16 @@ class TestHand(unittest.TestCase):
             'Found the wrong highest hand!')
 
 
+class TestBots(unittest.TestCase):
+    def test_equity_outs(self):
+        '''Test EquityBot outs on a flop and a turn'''
+        # 9 flush outs + 3 straight outs
+        self.assertEqual(
+            EquityBot.equity(BettingStage.FLOP, Card.new('AhKh'), Card.new('QhJh2c')), 0.24)
+        # 9 full house outs + 1 quads out
+        self.assertEqual(
+            EquityBot.equity(BettingStage.TURN, Card.new('7c7d'), Card.new('7h2s9dKc')), 0.2)
+
 class TestGame(unittest.TestCase):
     # preflop
     #     bets: 100, 100, 2, 50
@@ -161,6 +214,17 @@ class TestGame(unittest.TestCase):
 
         self.assertEqual(game.chips(), [20, 10, 100])
 
+    def test_split_pots(self):
+        '''Test splitting bets into side pots'''
+        pots = Pots(range(4))
+        pots.chips = 6
+        for p, bet in enumerate([10, 30, 10, 50]):
+            pots.bet(p, bet)
+        pots.split()
+
+        self.assertEqual([pot.total() for pot in pots], [46, 40, 20])
+        self.assertEqual([set(pot.players()) for pot in pots], [{0, 1, 2, 3}, {1, 3}, {3}])
+
     def test_all_fold(self):
         '''Test all players instantly folding'''
         game = Game(100, GameConfig.nl(2, 0))
@@ -401,18 +465,41 @@ class TestHistory(unittest.TestCase):
 
         remove('__test.phh')
 
+    def test_hand_actions(self):
+        '''Test that hand_actions matches splitting actions by hand'''
+        game = Game(100, GameConfig.nl(2, 0))
+        game.add_player(bots.Raiser(2))
+        game.add_player(bots.Checker())
+        game.add_player(bots.Folder())
+        random.seed(3)
+        for _ in range(3):
+            game.step_hand()
+
+        # split on the None that ends each hand
+        expected = [[]]
+        for action in game.history.actions:
+            if action is None:
+                expected.append([])
+            else:
+                expected[-1].append(action)
+
+        hand_count = game.history.hand_count
+        self.assertEqual(hand_count, 3)
+        self.assertEqual(
+            [game.history.hand_actions(h) for h in range(hand_count)],
+            expected[:hand_count]
+        )
+        self.assertEqual(game.history.actions_by_hand(), expected[:hand_count])
+
     def test_replays(self):
         '''Load .phh hands, test that they replay correctly'''
         for fname in os.listdir('data/wsop/'):
             with open('data/wsop/' + fname, 'rb') as f:
                 try:
                     hist = phh.load(f)
-                    replay = Game.replay(hist)
-                    while True:
-                        try:
-                            g = next(replay)
-                        except StopIteration:
-                            break
+                    # only the final state is checked
+                    for g in Game.replay(hist):
+                        pass
 
                     # verify replayed chips if finishing_stacks was included in file
                     if len(hist.chips) > 1: